@@ -6,10 +6,12 @@ Each row is one sample: timestamp, label, and pitch/roll for every segment.
 """
 
 import csv
+import math
 import os
-from time import sleep, time
+import struct
+from time import sleep, time, monotonic
 
-from imu_reader import setup, read_all_imus
+from imu_reader import setup, read_all_imus, FEATURE_COLS
 
 
 # -----------------------------
@@ -17,8 +19,16 @@ from imu_reader import setup, read_all_imus
 # -----------------------------
 
 CSV_FILE      = "posture_data.csv"
+COUNT_FILE    = "posture_data.count"    # running row count for CSV_FILE
 DELAY_SEC     = 0.10        # 10 samples per second
 CAPTURE_SEC   = 30.0        # seconds per capture session
+FLUSH_SEC     = 1.0         # push buffered rows to disk at least this often
+FLUSH_ROWS    = 32          # ...or once this many rows are buffered
+
+# "csv" writes straight to CSV_FILE. "f32" writes compact packed records to
+# BINARY_LOG instead (convert to CSV from the menu before training).
+LOG_FORMAT    = "csv"
+BINARY_LOG    = "posture_data.f32"
 
 LABELS = [
     "sitting_good",
@@ -27,84 +37,236 @@ LABELS = [
     "standing_bad",
 ]
 
-# CSV column order — timestamp + label + pitch/roll for each segment
-SEGMENTS = [
-    "left_thigh", 
-    "left_calf",
-    "right_thigh", 
-    "right_calf",
-    "upper_mid_back", 
-    "upper_back",
-    "right_shoulder", 
-    "left_shoulder",
-    "lower_mid_back", 
-    "lower_back",
-]
+# CSV column order — timestamp + label + pitch/roll for each segment.
+# read_all_imus() returns its row in FEATURE_COLS order, so the header comes
+# from the same list (segment order is imu_reader.SEGMENTS).
+CSV_HEADER = ["timestamp", "label"] + FEATURE_COLS
 
-CSV_HEADER = ["timestamp", "label"] + [
-    f"{seg}_{angle}"
-    for seg in SEGMENTS
-    for angle in ("pitch", "roll")
-]
+# One format string for a whole data row. Every field is a number or one of
+# LABELS, so nothing ever needs csv quoting. "\r\n" matches csv.writer's
+# default line ending used for the header.
+ROW_FMT = "{:.4f},{}," + ",".join(["{:.4f}"] * len(FEATURE_COLS)) + "\r\n"
+
+# One BINARY_LOG record: float64 timestamp (float32 can't hold epoch seconds
+# precisely), uint16 index into LABELS, then float32 pitch/roll per segment
+BIN_ROW = struct.Struct(f"<dH{len(FEATURE_COLS)}f")
 
 
 # -----------------------------
 # CSV Helpers
 # -----------------------------
 
+def format_row(timestamp, label, values):
+    """Format one data row as a CSV line. Missing values (NaN) become empty cells."""
+    if any(map(math.isnan, values)):
+        cells = ",".join("" if math.isnan(v) else f"{v:.4f}" for v in values)
+        return f"{timestamp:.4f},{label},{cells}\r\n"
+    return ROW_FMT.format(timestamp, label, *values)
+
+
 def write_header_if_needed(path):
-    """Write CSV header only if the file doesn't exist yet."""
-    if os.path.exists(path):
-        return
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(CSV_HEADER)
+    """
+    Write CSV header only if the file doesn't exist yet.
+    Opening with "x" (create-exclusive) does the existence check and the
+    create in one call, with no gap between them.
+
+    Returns:
+        True if the file was created (callers reset that file's row counter)
+    """
+    try:
+        with open(path, "x", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+    except FileExistsError:
+        return False
+    return True
+
+
+# -----------------------------
+# Row Counter
+# Kept in COUNT_FILE so "Show CSV info" doesn't have to read the whole CSV
+# -----------------------------
+
+def read_row_count():
+    """Return the saved row count, or None if there is no counter file."""
+    try:
+        with open(COUNT_FILE, "r") as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
 
+def write_row_count(n):
+    """Save the row count to COUNT_FILE."""
+    with open(COUNT_FILE, "w") as f:
+        f.write(str(n))
 
-def append_row(path, row):
-    """Append one row to the CSV."""
-    with open(path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(row)
+
+def count_rows(path):
+    """Count data rows by reading the whole CSV (slow — only used to seed COUNT_FILE)."""
+    with open(path, "r") as f:
+        return sum(1 for _ in f) - 1  # subtract header
+
+
+def estimate_rows(path):
+    """
+    Estimate data rows from the file size and the length of the first data row.
+    Used only when there is no counter file yet.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        first  = f.readline()
+    if not first:
+        return 0
+    return (os.path.getsize(path) - len(header)) // len(first)
+
+
+def add_to_row_count(n):
+    """Add n newly written rows to the saved count."""
+    current = read_row_count()
+    if current is None:
+        # CSV predates the counter file — count it once, then keep it running
+        current = count_rows(CSV_FILE) - n
+    write_row_count(current + n)
 
 
 # -----------------------------
 # Capture
 # -----------------------------
 
+def sample_rows():
+    """
+    Read all IMUs every DELAY_SEC seconds (deadline-scheduled, so read time
+    doesn't stack on top of the delay) for CAPTURE_SEC seconds.
+
+    Yields:
+        (timestamp, values) — values is a list of pitch/roll for every
+        segment in FEATURE_COLS order, NaN where a sensor failed to read
+    """
+    start = monotonic()
+    next_t = start
+
+    while monotonic() - start < CAPTURE_SEC:
+        values = read_all_imus().tolist()
+        timestamp = time()
+        yield timestamp, values
+
+        # Sleep only for what's left of this interval so slow reads
+        # (or writes in the caller) don't push every following sample later
+        next_t += DELAY_SEC
+        dt = next_t - monotonic()
+        if dt > 0:
+            sleep(dt)
+        else:
+            next_t = monotonic()
+
+
+def capture_csv(label):
+    """
+    Capture one session straight into CSV_FILE.
+
+    The CSV is opened once for the whole session. Rows are preformatted
+    with ROW_FMT and written in batches (every FLUSH_ROWS rows or FLUSH_SEC
+    seconds) instead of opening/closing the file for every sample.
+    """
+    if write_header_if_needed(CSV_FILE):
+        write_row_count(0)
+
+    count = 0
+    buf = []
+
+    with open(CSV_FILE, "a", newline="", encoding="utf-8", buffering=1 << 16) as f:
+        last_flush = monotonic()
+
+        try:
+            for timestamp, values in sample_rows():
+                buf.append(format_row(timestamp, label, values))
+                count += 1
+
+                now = monotonic()
+                if len(buf) >= FLUSH_ROWS or now - last_flush >= FLUSH_SEC:
+                    f.write("".join(buf))
+                    f.flush()
+                    buf.clear()
+                    last_flush = now
+        finally:
+            # Write whatever is left from the last partial batch
+            f.write("".join(buf))
+            f.flush()
+            add_to_row_count(count)
+
+    return count
+
+
+def capture_binary(label):
+    """
+    Capture one session into BINARY_LOG as fixed-size packed records.
+
+    Each sample is packed into one reused bytearray with BIN_ROW.pack_into
+    and handed to the buffered file — no per-row strings or lists are kept.
+    Use convert_binary_log() to turn the log into CSV rows for training.
+    """
+    label_idx = LABELS.index(label)
+    row = bytearray(BIN_ROW.size)
+    count = 0
+
+    with open(BINARY_LOG, "ab", buffering=1 << 16) as f:
+        last_flush = monotonic()
+
+        for timestamp, values in sample_rows():
+            BIN_ROW.pack_into(row, 0, timestamp, label_idx, *values)
+            f.write(row)
+            count += 1
+
+            now = monotonic()
+            if now - last_flush >= FLUSH_SEC:
+                f.flush()
+                last_flush = now
+
+    return count
+
+
 def capture_session(label):
     """
-    Read all IMUs at DELAY_SEC intervals for CAPTURE_SEC seconds.
+    Capture one labeled session in the format chosen by LOG_FORMAT.
     Each sample is saved as one row: timestamp, label, then pitch/roll
-    for every segment in SEGMENTS order.
+    for every segment in FEATURE_COLS order.
 
     Returns:
         number of samples saved (int)
     """
-    write_header_if_needed(CSV_FILE)
+    if LOG_FORMAT == "f32":
+        return capture_binary(label)
+    return capture_csv(label)
 
-    count = 0
-    start = time()
-
-    while time() - start < CAPTURE_SEC:
-        readings = read_all_imus()
-        timestamp = round(time(), 4)
-
-        # Flatten readings into a single row in SEGMENTS order
-        row = [timestamp, label]
-        for seg in SEGMENTS:
-            angles = readings.get(seg)
-            if angles is not None:
-                row.append(angles["pitch"])
-                row.append(angles["roll"])
-            else:
-                row.append(None)
-                row.append(None)
 
-        append_row(CSV_FILE, row)
-        count += 1
-        sleep(DELAY_SEC)
+def convert_binary_log():
+    """
+    Append every record in BINARY_LOG to CSV_FILE, then delete BINARY_LOG.
+    NaN values (failed sensor reads) become empty cells like a normal capture.
+
+    Returns:
+        number of rows converted (int)
+    """
+    if not os.path.exists(BINARY_LOG):
+        return 0
 
+    with open(BINARY_LOG, "rb") as f:
+        data = f.read()
+    # Drop a partial record left behind by an interrupted write
+    data = data[:len(data) - len(data) % BIN_ROW.size]
+
+    if write_header_if_needed(CSV_FILE):
+        write_row_count(0)
+
+    count = 0
+    with open(CSV_FILE, "a", newline="", encoding="utf-8") as f:
+        for timestamp, label_idx, *values in BIN_ROW.iter_unpack(data):
+            f.write(format_row(timestamp, LABELS[label_idx], values))
+            count += 1
+
+    add_to_row_count(count)
+    os.remove(BINARY_LOG)
     return count
 
 
@@ -120,7 +282,8 @@ def print_menu():
     print("  4) Capture: standing_good")
     print("  5) Capture: standing_bad")
     print("  6) Show CSV info")
-    print("  7) Quit")
+    print(f"  7) Convert {BINARY_LOG} to CSV")
+    print("  8) Quit")
 
 
 def main():
@@ -135,7 +298,7 @@ def main():
 
     while True:
         print_menu()
-        choice = input("\nChoose an option (1-7): ").strip()
+        choice = input("\nChoose an option (1-8): ").strip()
 
         if choice == "1":
             try:
@@ -154,25 +317,37 @@ def main():
             print(f"Hold the position and stay still. Capturing for {CAPTURE_SEC:.0f} seconds...\n")
             try:
                 n = capture_session(label)
-                print(f"Saved {n} samples to {CSV_FILE}\n")
+                print(f"Saved {n} samples to {BINARY_LOG if LOG_FORMAT == 'f32' else CSV_FILE}\n")
             except Exception as e:
                 print(f"Error during capture: {e}")
 
         elif choice == "6":
             print(f"\nCSV file: {CSV_FILE}")
             if os.path.exists(CSV_FILE):
-                with open(CSV_FILE, "r") as f:
-                    row_count = sum(1 for _ in f) - 1  # subtract header
-                print(f"Rows collected so far: {row_count}\n")
+                row_count = read_row_count()
+                if row_count is not None:
+                    print(f"Rows collected so far: {row_count}\n")
+                else:
+                    print(f"Rows collected so far: ~{estimate_rows(CSV_FILE)} (estimated)\n")
             else:
                 print("No data collected yet.\n")
+            if os.path.exists(BINARY_LOG):
+                n = os.path.getsize(BINARY_LOG) // BIN_ROW.size
+                print(f"Unconverted rows in {BINARY_LOG}: {n}\n")
 
         elif choice == "7":
+            try:
+                n = convert_binary_log()
+                print(f"\nConverted {n} rows from {BINARY_LOG} into {CSV_FILE}\n")
+            except Exception as e:
+                print(f"Error during conversion: {e}")
+
+        elif choice == "8":
             print("Done.")
             break
 
         else:
-            print("\nInvalid choice. Pick 1-7.\n")
+            print("\nInvalid choice. Pick 1-8.\n")
 
 
 if __name__ == "__main__":
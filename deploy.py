@@ -17,11 +17,14 @@ Hardware:
 """
 
 import joblib
-from time import sleep, time
+import numpy as np
+import pandas as pd
+import threading
+from time import sleep, time, monotonic
 from gpiozero import Buzzer, Button
 from lcd_i2c import LCD_I2C
 
-from imu_reader import setup, read_all_imus
+from imu_reader import setup, read_all_imus, FEATURE_COLS
 
 
 # -----------------------------
@@ -33,6 +36,7 @@ MODEL_FILE      = "model_package.joblib"
 BUZZER_PIN      = 18
 NAV_PIN         = 27        # navigate button — cycles A <-> B on LCD menu
 SEL_PIN         = 22        # select button  — confirms choice / exits continuous mode
+BOUNCE_SEC      = 0.05      # gpiozero debounce time for both buttons
 
 LCD_ADDRESS     = 39        
 LCD_COLS        = 16
@@ -41,7 +45,8 @@ LCD_ROWS        = 2
 BEEP_SHORT      = 0.1       
 BEEP_PAUSE      = 0.2       
 
-SAMPLE_INTERVAL = 1.0       # seconds between readings in continuous mode
+SAMPLE_INTERVAL = 1.0       # seconds between posture decisions in continuous mode
+VOTE_WINDOW     = 5         # readings per decision (spread over SAMPLE_INTERVAL), majority vote
 COOLDOWN_SEC    = 60.0      # seconds between bad posture alerts in continuous mode
 
 
@@ -53,12 +58,27 @@ model_package   = None
 model           = None
 feature_cols    = None
 encoder         = None
+feature_index   = None      # position in the read_all_imus() row of each model column
+x_buf           = None      # reusable (1, n_features) input row for run_model
+window_buf      = None      # reusable (VOTE_WINDOW, n_features) batch for continuous mode
+label_names     = None      # encoded class -> label string
+label_is_good   = None      # encoded class -> True for a "*_good" label
+onnx_session    = None      # onnxruntime session, None = predict with sklearn
+onnx_input      = None      # name of the ONNX model's input tensor
 
 buzzer          = None
 lcd             = None
 btn_nav         = None      # navigate button (GPIO 27)
 btn_sel         = None      # select button  (GPIO 22)
 
+# Button callbacks run on gpiozero's own thread, so they only set these
+# events; all cursor and LCD changes happen on the main thread
+nav_event       = threading.Event()     # navigate pressed
+sel_event       = threading.Event()     # select pressed
+button_event    = threading.Event()     # either button pressed (wakes run_lcd_menu)
+
+lcd_lines       = None      # (line0, line1) currently on the LCD, None = unknown
+
 
 # -----------------------------
 # Setup
@@ -69,7 +89,9 @@ def setup_hardware():
     Initialize IMU buses, buzzer, LCD, and buttons.
 
     Buzzer uses gpiozero.Buzzer 
-    Button uses gpiozero.Button
+    Button uses gpiozero.Button — presses are delivered as edge callbacks
+    (when_pressed) instead of polling is_pressed. The callbacks only set
+    events for the main thread to act on.
     """
     global buzzer, lcd, btn_nav, btn_sel
 
@@ -77,8 +99,10 @@ def setup_hardware():
 
     buzzer  = Buzzer(BUZZER_PIN)
 
-    btn_nav = Button(NAV_PIN, pull_up=True)
-    btn_sel = Button(SEL_PIN, pull_up=True)
+    btn_nav = Button(NAV_PIN, pull_up=True, bounce_time=BOUNCE_SEC)
+    btn_sel = Button(SEL_PIN, pull_up=True, bounce_time=BOUNCE_SEC)
+    btn_nav.when_pressed = on_nav_pressed
+    btn_sel.when_pressed = on_sel_pressed
 
     lcd = LCD_I2C(LCD_ADDRESS, LCD_COLS, LCD_ROWS)
     lcd.backlight.on()
@@ -86,19 +110,81 @@ def setup_hardware():
     print("Hardware ready.\n")
 
 
+def on_nav_pressed():
+    """gpiozero callback thread: record a navigate press."""
+    nav_event.set()
+    button_event.set()
+
+
+def on_sel_pressed():
+    """gpiozero callback thread: record a select press."""
+    sel_event.set()
+    button_event.set()
+
+
 def load_model():
     """
     Load the model package saved by train_model.py.
     Recycled: same joblib load + package unpacking as wk3day1_lab4.py
     """
-    global model_package, model, feature_cols, encoder
+    global model_package, model, feature_cols, encoder, feature_index, x_buf, window_buf
+    global label_names, label_is_good
 
+    # The package is lz4-compressed (training.py MODEL_COMPRESS), so it is
+    # read whole — joblib's mmap_mode only works on uncompressed files
     model_package = joblib.load(MODEL_FILE)
     model         = model_package["model"]
     feature_cols  = model_package["feature_cols"]
     encoder       = model_package["encoder"]
 
-    print(f"Model loaded. Labels: {list(encoder.classes_)}\n")
+    # Training uses every core (n_jobs=-1); for 1-5 row predictions the
+    # thread dispatch costs more than walking the trees, so predict serially
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+
+    # read_all_imus() returns a flat row in imu_reader.FEATURE_COLS order.
+    # Work out once where each of the model's columns sits in that row, so
+    # building a feature row is a single np.take per prediction.
+    feature_index = np.array([FEATURE_COLS.index(col) for col in feature_cols])
+    x_buf      = np.empty((1, len(feature_cols)), dtype=np.float32)
+    window_buf = np.empty((VOTE_WINDOW, len(feature_cols)), dtype=np.float32)
+
+    # Decode predictions with a plain list lookup instead of
+    # encoder.inverse_transform, and work out good/bad once per label
+    label_names   = [str(c) for c in encoder.classes_]
+    label_is_good = ["good" in c for c in label_names]
+
+    load_onnx()
+    backend = "onnxruntime" if onnx_session is not None else "sklearn"
+    print(f"Model loaded ({backend}). Labels: {label_names}\n")
+
+
+def load_onnx():
+    """
+    Use the ONNX export stored in the model package (training.py option 8)
+    when there is one and onnxruntime is installed. Otherwise leave
+    onnx_session as None. The export is saved alongside the model and
+    encoder it was made from, so it always matches them.
+    """
+    global onnx_session, onnx_input
+    onnx_session = None
+
+    onnx_bytes = model_package.get("onnx")
+    if onnx_bytes is None:
+        return
+    try:
+        import onnxruntime
+    except ImportError:
+        print("onnxruntime not installed — predicting with sklearn.")
+        return
+
+    # One thread: same reasoning as n_jobs=1 above for 1-5 row batches
+    opts = onnxruntime.SessionOptions()
+    opts.intra_op_num_threads = 1
+    onnx_session = onnxruntime.InferenceSession(
+        onnx_bytes, opts, providers=["CPUExecutionProvider"]
+    )
+    onnx_input = onnx_session.get_inputs()[0].name
 
 
 # -----------------------------
@@ -122,12 +208,29 @@ def beep(n):
 # -----------------------------
 
 def lcd_show(line0, line1=""):
-    """Clear the LCD and write two lines of text."""
-    lcd.clear()
-    lcd.cursor.setPos(0, 0)
-    lcd.write_text(line0[:LCD_COLS])
-    lcd.cursor.setPos(1, 0)
-    lcd.write_text(line1[:LCD_COLS])
+    """
+    Write two lines of text to the LCD.
+
+    Only rows whose text changed are rewritten (padded to LCD_COLS so old
+    characters get overwritten), so repeating the same label in continuous
+    mode costs no I2C traffic. The LCD is only cleared the first time.
+    """
+    global lcd_lines
+
+    new = (line0[:LCD_COLS].ljust(LCD_COLS), line1[:LCD_COLS].ljust(LCD_COLS))
+    if new == lcd_lines:
+        return
+
+    if lcd_lines is None:
+        lcd.clear()
+        lcd_lines = ("", "")
+
+    for row in (0, 1):
+        if new[row] != lcd_lines[row]:
+            lcd.cursor.setPos(row, 0)
+            lcd.write_text(new[row])
+
+    lcd_lines = new
 
 
 def lcd_draw_menu(cursor_pos):
@@ -138,7 +241,6 @@ def lcd_draw_menu(cursor_pos):
     The LCD blink cursor acts as the selector indicator — same blink
     usage as wk1 LCD lab.
     """
-    lcd.clear()
     lcd.blink.on()
 
     if cursor_pos == 0:
@@ -148,10 +250,7 @@ def lcd_draw_menu(cursor_pos):
         line0 = "  A: Check Now "
         line1 = "> B: Continuous"
 
-    lcd.cursor.setPos(0, 0)
-    lcd.write_text(line0[:LCD_COLS])
-    lcd.cursor.setPos(1, 0)
-    lcd.write_text(line1[:LCD_COLS])
+    lcd_show(line0, line1)
 
     # Park the blinking cursor at the start of the selected row
     lcd.cursor.setPos(cursor_pos, 0)
@@ -168,6 +267,11 @@ def run_lcd_menu():
     Navigate button (GPIO 27) toggles cursor between A and B.
     Select button  (GPIO 22) confirms and returns the chosen mode.
 
+    Both buttons are handled by gpiozero edge callbacks that only set
+    events, so this blocks on button_event — no polling loop — and does the
+    cursor/LCD update itself. Keeping every LCD write on the main thread
+    means a late navigate press can't interleave with the next screen.
+
     Returns:
         "check"      if A selected
         "continuous" if B selected
@@ -175,52 +279,76 @@ def run_lcd_menu():
     cursor = 0      # 0 = Check Now, 1 = Continuous
     lcd_draw_menu(cursor)
 
+    # Drop presses made while a mode was running
+    nav_event.clear()
+    sel_event.clear()
+    button_event.clear()
+
     while True:
-        if btn_nav.is_pressed:
+        button_event.wait()
+        # Clear before checking: a press landing after this sets it again
+        button_event.clear()
+        if sel_event.is_set():
+            break
+        if nav_event.is_set():
             # Toggle between the two options
+            nav_event.clear()
             cursor = 1 if cursor == 0 else 0
             lcd_draw_menu(cursor)
-            sleep(0.3)      
 
-        if btn_sel.is_pressed:
-            lcd.blink.off()
-            sleep(0.2)      
-            return "check" if cursor == 0 else "continuous"
-
-        sleep(0.05)   
+    lcd.blink.off()
+    return "check" if cursor == 0 else "continuous"
 
 
 # -----------------------------
 # Inference
 # -----------------------------
 
-def predict_posture():
+def fill_features(readings, out):
     """
-    Read all IMUs, build a feature row, and return the predicted label string.
-    Returns None if any sensor read fails.
+    Copy one read_all_imus() row into a feature row (1-D slice of x_buf /
+    window_buf), reordered to the model's feature_cols.
+
+    Returns:
+        True if every sensor was read, False on any sensor failure (NaN)
+    """
+    np.take(readings, feature_index, out=out)
+    return not np.isnan(out).any()
+
+
+def run_model(X):
+    """
+    Predict encoded labels for a float32 (rows, n_features) batch.
 
-    Building the feature row follows the same SEGMENTS order as
-    data_collection.py so the column order matches what the model was trained on.
+    Goes through the ONNX session when one is loaded. Otherwise uses sklearn:
+    models fitted on a DataFrame expect named columns, so the buffer is
+    wrapped without copying it; else sklearn gets the array directly.
+
+    Returns:
+        1-D array of encoded labels
     """
-    import pandas as pd
+    if onnx_session is not None:
+        return onnx_session.run(None, {onnx_input: X})[0]
+    if hasattr(model, "feature_names_in_"):
+        X = pd.DataFrame(X, columns=feature_cols, copy=False)
+    return model.predict(X)
 
-    readings = read_all_imus()
 
-    row = {}
-    for col in feature_cols:
+def predict_posture():
+    """
+    Read all IMUs, build a feature row, and return the predicted label.
+    Returns None if any sensor read fails.
 
-        seg   = "_".join(col.split("_")[:-1])
-        angle = col.split("_")[-1]
+    The row is written in place into x_buf instead of building a new DataFrame.
 
-        angles = readings.get(seg)
-        if angles is None:
-            return None     # sensor failure — skip this sample
-        row[col] = angles[angle]
+    Returns:
+        (label, is_good) or None
+    """
+    if not fill_features(read_all_imus(), x_buf[0]):
+        return None
 
-    X_row        = pd.DataFrame([row], columns=feature_cols)
-    pred_encoded = model.predict(X_row)[0]
-    pred_label   = encoder.inverse_transform([pred_encoded])[0]
-    return pred_label
+    pred_encoded = run_model(x_buf)[0]
+    return label_names[pred_encoded], label_is_good[pred_encoded]
 
 
 # -----------------------------
@@ -234,14 +362,14 @@ def check_now():
     Shows result on LCD.
     """
     lcd_show("Checking...", "Hold still")
-    label = predict_posture()
+    result = predict_posture()
 
-    if label is None:
+    if result is None:
         lcd_show("Sensor error", "Try again")
         print("Sensor read failed.\n")
         return
 
-    is_good = "good" in label
+    label, is_good = result
 
     lcd_show(label, "Good!" if is_good else "Fix posture")
     print(f"Detected: {label}")
@@ -254,36 +382,61 @@ def check_now():
 
 def continuous_mode():
     """
-    Continuous monitoring mode. Samples every SAMPLE_INTERVAL seconds.
+    Continuous monitoring mode. Makes a posture decision every SAMPLE_INTERVAL
+    seconds from VOTE_WINDOW readings taken evenly across the interval: all
+    readings are classified in one run_model call and the most common
+    label wins (one batched call is about as cheap as a single-row one, and
+    the vote filters out one-off misclassifications).
     Beeps once on bad posture detection with a COOLDOWN_SEC cooldown
     before the next alert.
     Press select button (GPIO 22) to stop and return to LCD menu.
 
     Recycled: same loop + exit pattern as run_live_inference() in wk3day1_lab5.py
-    New: btn_sel.is_pressed replaces KeyboardInterrupt as the exit trigger
+    New: a select press (sel_event) replaces KeyboardInterrupt as the exit trigger
     """
     last_alert = 0.0    # timestamp of the last bad posture beep
+    step       = SAMPLE_INTERVAL / VOTE_WINDOW
+    next_t     = monotonic()
+    taken      = 0      # readings taken in the current window
+    n_valid    = 0      # rows of window_buf filled with complete readings
 
+    sel_event.clear()
     lcd_show("Monitoring...", "SEL to stop")
     print("Continuous mode running. Press select button to stop.\n")
 
     while True:
-        # Exit back to menu when select button is pressed
-        if btn_sel.is_pressed:
-            sleep(0.2) 
+        # Wait only for what's left of the interval, so the time spent
+        # reading/predicting/beeping doesn't stretch the sample period.
+        # A select press ends the wait immediately.
+        dt = next_t - monotonic()
+        if sel_event.wait(timeout=max(dt, 0.0)):
             lcd_show("Stopped", "")
             print("Stopped continuous mode.\n")
             return
 
-        label = predict_posture()
+        if dt <= 0:
+            next_t = monotonic()
+        next_t += step
 
-        if label is None:
+        if fill_features(read_all_imus(), window_buf[n_valid]):
+            n_valid += 1
+        else:
             print("Sensor read failed — skipping sample.")
-            sleep(SAMPLE_INTERVAL)
+
+        taken += 1
+        if taken < VOTE_WINDOW:
+            continue
+
+        # Window complete — classify every reading at once, majority vote
+        rows, taken, n_valid = n_valid, 0, 0
+        if rows == 0:
             continue
 
-        is_good = "good" in label
-        now     = time()
+        preds        = run_model(window_buf[:rows])
+        pred_encoded = np.bincount(preds).argmax()
+        label        = label_names[pred_encoded]
+        is_good      = label_is_good[pred_encoded]
+        now          = time()
 
         print(f"Posture: {label}")
         lcd_show(label, "OK" if is_good else "Fix posture")
@@ -293,8 +446,6 @@ def continuous_mode():
             beep(1)
             last_alert = now
 
-        sleep(SAMPLE_INTERVAL)
-
 
 # -----------------------------
 # Main
@@ -320,6 +471,13 @@ def main():
     except FileNotFoundError:
         print(f"ERROR: {MODEL_FILE} not found. Train the model first.")
         return
+    except ValueError as e:
+        # joblib raises ValueError when the package is lz4-compressed
+        # (training.py MODEL_COMPRESS) but lz4 isn't installed here
+        if "lz4" not in str(e).lower():
+            raise
+        print(f"ERROR: {MODEL_FILE} is lz4-compressed. Run: pip install lz4")
+        return
 
     # Startup splash — same idea as wk1 LCD lab
     lcd_show("Posture Coach", "Starting...")
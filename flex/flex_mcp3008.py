@@ -38,17 +38,29 @@ def setup_mcp3008(cs_pin="D8"):
     _ch0 = AnalogIn(_mcp, MCP.P0)  # CH0
 
 
+def read_flex():
+    """
+    Read raw ADC value and voltage from ONE SPI transaction.
+    Voltage is derived from the raw value the same way the library does it
+    (raw * Vref / 65535), so there's no second read.
+
+    Returns:
+        (raw, volts)
+    """
+    setup_mcp3008()
+    raw = int(_ch0.value)
+    return raw, raw * _mcp.reference_voltage / 65535
+
+
 def read_flex_raw():
     """
     Read raw ADC value (0..65535-ish scaling from library).
     """
-    setup_mcp3008()
-    return int(_ch0.value)
+    return read_flex()[0]
 
 
 def read_flex_voltage():
     """
     Read flex voltage in Volts (0.0..~3.3).
     """
-    setup_mcp3008()
-    return float(_ch0.voltage)
+    return read_flex()[1]
@@ -5,12 +5,11 @@ Menu-based flex sensor tester (MCP3008 CH0).
 """
 
 from time import sleep, time
-from flex_mcp3008 import setup_mcp3008, read_flex_raw, read_flex_voltage
+from flex_mcp3008 import setup_mcp3008, read_flex
 
 
 def print_once():
-    raw = read_flex_raw()
-    v = read_flex_voltage()
+    raw, v = read_flex()
     print(f"\nFLEX CH0: raw={raw}  voltage={v:.3f} V\n")
 
 
@@ -18,8 +17,7 @@ def stream(seconds=10.0, delay=0.10):
     end_t = time() + seconds
     try:
         while time() < end_t:
-            raw = read_flex_raw()
-            v = read_flex_voltage()
+            raw, v = read_flex()
             print(f"raw={raw:5d}  V={v:.3f}")
             sleep(delay)
     except KeyboardInterrupt:
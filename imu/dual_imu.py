@@ -8,16 +8,40 @@ to support two sensors: 0x68 and 0x69
 """
 
 import math
-from math import degrees, atan2, sqrt
+import struct
+from math import degrees, atan2, hypot, radians
+
+
+# MPU6050 data registers: ACCEL_XOUT_H (0x3B) .. GYRO_ZOUT_L (0x48) are
+# contiguous -> accel xyz, temp, gyro xyz as 7 big-endian int16s
+DATA_REG = bytes([0x3B])
+DATA_FMT = ">hhhhhhh"
+
+# LSB per g / LSB per deg/s for each range setting (datasheet table)
+ACCEL_LSB = {0: 16384.0, 1: 8192.0, 2: 4096.0, 3: 2048.0}
+GYRO_LSB  = {0: 131.0, 1: 65.5, 2: 32.8, 3: 16.4}
+
+STANDARD_GRAVITY = 9.80665
 
 # Globals
 i2c = None
 mpu_a = None  # 0x68
 mpu_b = None  # 0x69
+scales_a = None  # (accel m/s^2 per LSB, gyro rad/s per LSB) for mpu_a
+scales_b = None
+_buf14 = bytearray(14)
+
+
+def sensor_scales(mpu):
+    # Read the range registers once so every burst read can scale without
+    # another I2C round-trip
+    a_scale = STANDARD_GRAVITY / ACCEL_LSB[mpu.accelerometer_range]
+    g_scale = radians(1.0) / GYRO_LSB[mpu.gyro_range]
+    return a_scale, g_scale
 
 
 def setup_dual_mpu():
-    global i2c, mpu_a, mpu_b
+    global i2c, mpu_a, mpu_b, scales_a, scales_b
 
     if i2c is not None:
         return
@@ -30,33 +54,49 @@ def setup_dual_mpu():
     mpu_a = adafruit_mpu6050.MPU6050(i2c, address=0x68)
     mpu_b = adafruit_mpu6050.MPU6050(i2c, address=0x69)
 
+    scales_a = sensor_scales(mpu_a)
+    scales_b = sensor_scales(mpu_b)
 
-def read_accel_both():
+
+def read_accel_gyro(mpu, scales):
+    # One 14-byte burst instead of separate .acceleration / .gyro reads.
+    # Returns the same units as the library: m/s^2 and rad/s
+    a_scale, g_scale = scales
+    with mpu.i2c_device as dev:
+        dev.write_then_readinto(DATA_REG, _buf14)
+    ax, ay, az, _temp, gx, gy, gz = struct.unpack(DATA_FMT, _buf14)
+    return (
+        (ax * a_scale, ay * a_scale, az * a_scale),
+        (gx * g_scale, gy * g_scale, gz * g_scale),
+    )
+
+
+def read_both():
     setup_dual_mpu()
-    ax1, ay1, az1 = mpu_a.acceleration
-    ax2, ay2, az2 = mpu_b.acceleration
-    return (ax1, ay1, az1), (ax2, ay2, az2)
+    acc_a, gyr_a = read_accel_gyro(mpu_a, scales_a)
+    acc_b, gyr_b = read_accel_gyro(mpu_b, scales_b)
+    return (acc_a, acc_b), (gyr_a, gyr_b)
+
+
+def read_accel_both():
+    return read_both()[0]
 
 
 def read_gyro_both():
-    setup_dual_mpu()
-    gx1, gy1, gz1 = mpu_a.gyro
-    gx2, gy2, gz2 = mpu_b.gyro
-    return (gx1, gy1, gz1), (gx2, gy2, gz2)
+    return read_both()[1]
 
 
 def accel_magnitude(ax, ay, az):
-    return math.sqrt(ax**2 + ay**2 + az**2)
+    return math.hypot(ax, ay, az)
 
 def gyro_magnitude(gx, gy, gz):
-    return math.sqrt(gx**2 + gy**2 + gz**2)
+    return math.hypot(gx, gy, gz)
 
 def pitch_roll_from_accel(ax, ay, az):
-    pitch = degrees(atan2(-ax, sqrt(ay*ay + az*az)))
+    pitch = degrees(atan2(-ax, hypot(ay, az)))
     roll  = degrees(atan2(ay, az))
     return pitch, roll
 
-
 def round_vec(v, n=2):
     return [round(x, n) for x in v]
 
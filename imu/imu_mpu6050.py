@@ -10,7 +10,7 @@ Install:
 
 import time 
 import math
-from math import degrees, atan2, sqrt
+from math import degrees, atan2, hypot
 
 
 # We'll create these once and reuse them
@@ -57,13 +57,13 @@ def accel_magnitude(ax, ay, az):
     """
     Compute the magnitude of acceleration from x/y/z components.
     """
-    return math.sqrt(ax**2 + ay**2 + az**2)
+    return math.hypot(ax, ay, az)
 
 def gyro_magnitude(gx, gy, gz):
     """
     Compute the magnitude of gyroscope from x/y/z components.
     """
-    return math.sqrt(gx**2 + gy**2 + gz**2)
+    return math.hypot(gx, gy, gz)
 
 def pitch_roll_from_accel(ax, ay, az):
     """
@@ -72,7 +72,7 @@ def pitch_roll_from_accel(ax, ay, az):
     Returns:
         (pitch_deg, roll_deg)
     """
-    pitch = degrees(atan2(-ax, sqrt(ay*ay + az*az)))
+    pitch = degrees(atan2(-ax, hypot(ay, az)))
     roll  = degrees(atan2(ay, az))
     return pitch, roll
 
@@ -5,16 +5,21 @@ Reads pitch and roll angles from all 10 MPU6050 IMUs:
   - 8 IMUs via TCA9548A multiplexer (channels 0-7)
   - 2 IMUs directly on I2C bus (0x68, 0x69)
 
-Using MPU6050 and TCA9548A channel switching via smbus2 and adafruit_mpu6050 for sensor reads.
+Using TCA9548A channel switching and raw MPU6050 accel burst reads via smbus2.
+adafruit_mpu6050 is only used in setup() to wake and configure each sensor.
 
-Returns a dictionary of {segment_name: {"pitch": float, "roll": float}}
+read_all_imus() returns a flat float32 row of pitch/roll per segment in
+FEATURE_COLS order; readings_as_dict() turns it into
+{segment_name: {"pitch": float, "roll": float}} for display.
 """
 
 import smbus2
+import struct
 import board
 import busio
 import adafruit_mpu6050
-from math import atan2, sqrt, pi
+import threading
+import numpy as np
 
 
 # -----------------------------
@@ -22,6 +27,15 @@ from math import atan2, sqrt, pi
 # -----------------------------
 
 TCA_ADDRESS = 0x70      # TCA9548A multiplexer
+MPU_ADDRESS = 0x68      # every muxed MPU6050 is at the default address
+
+ACCEL_XOUT_H = 0x3B     # first of the 6 accel data registers (X/Y/Z, big-endian int16)
+
+# I2C fast mode. MPU6050 and TCA9548A are both rated for 400 kHz (MPU6050
+# datasheet: "400kHz Fast Mode I2C"). On a Raspberry Pi the hardware bus
+# clock is set by the kernel, so also put dtparam=i2c_arm_baudrate=400000
+# in /boot/config.txt (see README) — smbus2 and busio share that bus.
+I2C_FREQUENCY = 400_000
 
 # Map each TCA channel to a body part
 TCA_CHANNEL_MAP = {
@@ -40,13 +54,72 @@ DIRECT_ADDRESS_MAP = {
     0x69: "lower_back",
 }
 
+# TCA9548A control byte for each channel: only that channel's bit set
+CHANNEL_BYTES = tuple(1 << ch for ch in range(8))
+
+# Flattened (channel/address, segment) pairs, built once so the read sweep
+# doesn't rebuild dict views on every call
+TCA_SENSORS    = tuple(TCA_CHANNEL_MAP.items())
+DIRECT_SENSORS = tuple(DIRECT_ADDRESS_MAP.items())
+
+# Feature order — same segment/column order as data_collection.py and
+# training.py, so a read_all_imus() row lines up with the model's columns
+SEGMENTS = [
+    "left_thigh",
+    "left_calf",
+    "right_thigh",
+    "right_calf",
+    "upper_mid_back",
+    "upper_back",
+    "right_shoulder",
+    "left_shoulder",
+    "lower_mid_back",
+    "lower_back",
+]
+
+FEATURE_COLS = [
+    f"{seg}_{angle}"
+    for seg in SEGMENTS
+    for angle in ("pitch", "roll")
+]
+
+N_IMUS = len(SEGMENTS)
+
+# Row of each segment in the sweep buffers, and the same sensor lists as
+# above with that row attached, so the sweep writes straight into place
+_FEATURE_INDEX = {seg: i for i, seg in enumerate(SEGMENTS)}
+TCA_ROWS       = tuple((ch, _FEATURE_INDEX[seg]) for ch, seg in TCA_SENSORS)
+DIRECT_ROWS    = tuple((addr, _FEATURE_INDEX[seg]) for addr, seg in DIRECT_SENSORS)
+
 
 # -----------------------------
 # Globals
 # -----------------------------
 
 i2c = None          
-bus = None          # smbus2 bus (used only for TCA9548A channel switching)
+bus = None          # smbus2 bus (TCA9548A channel switching + raw accel reads)
+bus_write = None    # bus.write_byte, bound once in setup() for the hot path
+
+# MPU6050 drivers, created once in setup(). Constructing one resets, wakes and
+# configures the sensor over I2C; after that the reads go straight through
+# read_raw_accel().
+tca_mpus    = {}    # {channel: MPU6050}
+direct_mpus = {}    # {address: MPU6050}
+
+# The direct 0x68 sensor shares bus 1 (and its address) with the muxed
+# sensors, so only one thread may drive the mux + sensors at a time. Also
+# guards the shared sweep buffers below.
+bus_lock = threading.Lock()
+
+# Reused every sweep, one row per IMU in SEGMENTS order:
+#  - raw accel counts kept as int16, exactly as the MPU6050 sends them
+#    (int16 has no NaN, so _acc_ok marks which rows were actually read)
+#  - float32 copy of those counts, cast once per sweep for the angle math
+#  - the returned feature row — interleaved pitch/roll in FEATURE_COLS order
+_acc_buf      = np.zeros((N_IMUS, 3), dtype=np.int16)
+_acc_ok       = np.zeros(N_IMUS, dtype=bool)
+_acc_f32      = np.empty((N_IMUS, 3), dtype=np.float32)
+_readings_buf = np.full(2 * N_IMUS, np.nan, dtype=np.float32)
 
 
 # -----------------------------
@@ -55,16 +128,38 @@ bus = None          # smbus2 bus (used only for TCA9548A channel switching)
 
 def setup():
     """
-    Initialize both I2C buses.
-    - smbus2 bus for TCA9548A channel switching
-    - adafruit busio I2C for reading MPU6050 sensors
+    Initialize both I2C buses and create one MPU6050 driver per sensor.
+    - smbus2 bus for TCA9548A channel switching and raw accel reads
+    - adafruit busio I2C for waking/configuring the MPU6050 sensors
+
+    A sensor that fails to initialize here is retried on its next read.
     """
-    global i2c, bus
+    global i2c, bus, bus_write
 
     bus = smbus2.SMBus(1)                       
-    i2c = busio.I2C(board.SCL, board.SDA)       
+    bus_write = bus.write_byte
+    i2c = busio.I2C(board.SCL, board.SDA, frequency=I2C_FREQUENCY)
     print("I2C buses initialized.")
 
+    tca_mpus.clear()
+    direct_mpus.clear()
+
+    for channel, segment in TCA_SENSORS:
+        try:
+            select_channel(channel)
+            tca_mpus[channel] = adafruit_mpu6050.MPU6050(i2c)
+        except Exception as e:
+            print(f"Error initializing TCA channel {channel} ({segment}): {e}")
+    close_channels()
+
+    for address, segment in DIRECT_SENSORS:
+        try:
+            direct_mpus[address] = adafruit_mpu6050.MPU6050(i2c, address=address)
+        except Exception as e:
+            print(f"Error initializing direct IMU at {hex(address)} ({segment}): {e}")
+
+    print(f"{len(tca_mpus) + len(direct_mpus)}/{N_IMUS} IMUs initialized.")
+
 
 
 # TCA9548A Channel Control
@@ -79,13 +174,15 @@ def select_channel(channel):
      - channel 2 -> 0b00000100 (4)
      - ...
      - channel 7 -> 0b10000000 (128)
+
+    The bytes come from the CHANNEL_BYTES table.
     """
-    bus.write_byte(TCA_ADDRESS, 1 << channel)
+    bus_write(TCA_ADDRESS, CHANNEL_BYTES[channel])
 
 
 def close_channels():
     """Close all TCA9548A channels"""
-    bus.write_byte(TCA_ADDRESS, 0)
+    bus_write(TCA_ADDRESS, 0)
 
 
 # -----------------------------
@@ -93,57 +190,108 @@ def close_channels():
 # Pitch and roll calculations based on raw accelerometer data
 # -----------------------------
 
-def compute_angles(ax, ay, az):
+def compute_angles(acc, pitch=None, roll=None):
     """
-    Compute pitch and roll in degrees from raw accelerometer values.
+    Compute pitch and roll in degrees from raw accelerometer values,
+    for any number of IMUs at once (one numpy call per angle, no Python loop).
 
     Pitch: rotation around the left-right axis (forward/backward tilt)
     Roll:  rotation around the front-back axis (side tilt)
 
+    Args:
+        acc:   (N, 3) float array of ax, ay, az — one row per IMU
+        pitch: optional (N,) array to write pitch into instead of allocating
+        roll:  optional (N,) array to write roll into instead of allocating
+
     Returns:
-        (pitch, roll) as floats in degrees
+        (pitch, roll) as (N,) arrays in degrees. A NaN row gives NaN angles.
     """
-    pitch = atan2(-ax, sqrt(ay * ay + az * az)) * (180.0 / pi)
-    roll  = atan2(ay, az) * (180.0 / pi)
+    ax, ay, az = acc[:, 0], acc[:, 1], acc[:, 2]
+
+    pitch = np.arctan2(-ax, np.hypot(ay, az), out=pitch)
+    np.degrees(pitch, out=pitch)
+    roll = np.arctan2(ay, az, out=roll)
+    np.degrees(roll, out=roll)
     return pitch, roll
 
 
+def pack_features(acc, out):
+    """
+    Compute angles for a whole sweep straight into out as
+    [pitch0, roll0, pitch1, roll1, ...].
+
+    Args:
+        acc: (N, 3) float32 array of ax, ay, az
+        out: (2N,) float32 array, filled in place
+
+    Returns:
+        out
+    """
+    compute_angles(acc, pitch=out[0::2], roll=out[1::2])    # views into out
+    return out
+
+
 # -----------------------------
 # Reading Sensors
 # -----------------------------
 
-def read_tca_imu(channel):
+# Prebuilt (write register, read 6 bytes) message pairs per I2C address
+_accel_msgs = {}
+
+
+def read_raw_accel(address):
+    """
+    Read the accelerometer of the MPU6050 at `address` in ONE I2C
+    transaction: write the ACCEL_XOUT_H register, then burst-read 6 bytes.
+
+    The values are left as raw int16 counts — pitch/roll only depend on
+    the ratios between axes, so converting to g or m/s^2 is unnecessary.
+
+    Returns:
+        (ax, ay, az) raw counts
+    """
+    msgs = _accel_msgs.get(address)
+    if msgs is None:
+        msgs = _accel_msgs[address] = (
+            smbus2.i2c_msg.write(address, [ACCEL_XOUT_H]),
+            smbus2.i2c_msg.read(address, 6),
+        )
+    bus.i2c_rdwr(*msgs)
+    return struct.unpack(">hhh", bytes(msgs[1]))
+
+
+def read_tca_accel(channel):
     """
-    Select a TCA channel, read the MPU6050 on that channel, return angles.
+    Select a TCA channel and read the MPU6050 accelerometer on that channel.
+
+    The channel is left open — the next select_channel() replaces it, so
+    closing between reads in a sweep is wasted bus traffic. Call
+    close_channels() before talking to the direct 0x68/0x69 sensors.
 
     Returns:
-        {"pitch": float, "roll": float} or None on failure
+        (ax, ay, az) raw counts, or None on failure
     """
     try:
         select_channel(channel)
-        mpu = adafruit_mpu6050.MPU6050(i2c)
-        ax, ay, az = mpu.acceleration
-        pitch, roll = compute_angles(float(ax), float(ay), float(az))
-        close_channels()
-        return {"pitch": round(pitch, 3), "roll": round(roll, 3)}
+        if channel not in tca_mpus:
+            tca_mpus[channel] = adafruit_mpu6050.MPU6050(i2c)   # wake + configure
+        return read_raw_accel(MPU_ADDRESS)
     except Exception as e:
-        close_channels()
         print(f"Error reading TCA channel {channel}: {e}")
         return None
 
 
-def read_direct_imu(address):
+def read_direct_accel(address):
     """
-    Read an MPU6050 connected directly on I2C (not through TCA).
+    Read the accelerometer of an MPU6050 connected directly on I2C (not through TCA).
 
     Returns:
-        {"pitch": float, "roll": float} or None on failure
+        (ax, ay, az) raw counts, or None on failure
     """
     try:
-        mpu = adafruit_mpu6050.MPU6050(i2c, address=address)
-        ax, ay, az = mpu.acceleration
-        pitch, roll = compute_angles(float(ax), float(ay), float(az))
-        return {"pitch": round(pitch, 3), "roll": round(roll, 3)}
+        if address not in direct_mpus:
+            direct_mpus[address] = adafruit_mpu6050.MPU6050(i2c, address=address)
+        return read_raw_accel(address)
     except Exception as e:
         print(f"Error reading direct IMU at address {hex(address)}: {e}")
         return None
@@ -155,7 +303,61 @@ def read_direct_imu(address):
 
 def read_all_imus():
     """
-    Read all 10 IMUs and return a dictionary of segment angles.
+    Read all 10 IMUs and return one flat feature row of segment angles.
+
+    Returns:
+        float32 array of length 20 in FEATURE_COLS order:
+        [left_thigh_pitch, left_thigh_roll, left_calf_pitch, ...].
+        Both values are NaN if that sensor failed to read.
+
+        The array is a preallocated buffer that the next call overwrites —
+        copy it if you need to keep it. Use readings_as_dict() for a
+        {segment: {"pitch", "roll"}} view (display only).
+
+    The sweep is serial on purpose: every sensor (muxed or direct) sits on
+    the same physical I2C bus 1, and the muxed MPU6050s answer at 0x68 just
+    like the direct one. Reading them from parallel threads would only
+    contend for the bus lock, or read the wrong sensor while a TCA
+    channel is open. The whole sweep holds bus_lock so concurrent callers
+    can't interleave mux switches.
+
+    Raw int16 accel counts are collected into _acc_buf during the sweep,
+    cast to float32 once, and all angles are computed at once with
+    pack_features.
+    """
+    with bus_lock:
+        # Read 8 IMUs through TCA9548A
+        for channel, row in TCA_ROWS:
+            acc = read_tca_accel(channel)
+            _acc_ok[row] = acc is not None
+            if acc is not None:
+                _acc_buf[row] = acc
+
+        # Close the mux once for the whole sweep, so the last TCA channel's
+        # sensor (also at 0x68) doesn't answer for the direct IMU
+        close_channels()
+
+        # Read 2 direct IMUs
+        for address, row in DIRECT_ROWS:
+            acc = read_direct_accel(address)
+            _acc_ok[row] = acc is not None
+            if acc is not None:
+                _acc_buf[row] = acc
+
+        # One int16 -> float32 cast for the whole sweep (float before the
+        # math, so negating -32768 can't wrap); failed sensors become NaN
+        # rows so their angles come out NaN
+        np.copyto(_acc_f32, _acc_buf)
+        _acc_f32[~_acc_ok] = np.nan
+        pack_features(_acc_f32, _readings_buf)
+
+    return _readings_buf
+
+
+def readings_as_dict(readings):
+    """
+    Convert a read_all_imus() row into a dictionary of segment angles.
+    Meant for the menu/display path, not the sampling loop.
 
     Returns:
         dict: {segment_name: {"pitch": float, "roll": float}}
@@ -168,23 +370,28 @@ def read_all_imus():
             ...
         }
     """
-    readings = {}
-
-    # Read 8 IMUs through TCA9548A
-    for channel, segment in TCA_CHANNEL_MAP.items():
-        readings[segment] = read_tca_imu(channel)
-
-    # Read 2 direct IMUs
-    for address, segment in DIRECT_ADDRESS_MAP.items():
-        readings[segment] = read_direct_imu(address)
-
-    return readings
+    values = readings.tolist()
+    out = {}
+    for i, segment in enumerate(SEGMENTS):
+        pitch, roll = values[2 * i], values[2 * i + 1]
+        if np.isnan(pitch):     # sensor failed to read
+            out[segment] = None
+        else:
+            out[segment] = {"pitch": pitch, "roll": roll}
+    return out
 
 
 # -----------------------------
 # Menu
 # -----------------------------
 
+def format_angles(angles):
+    """Format one segment's reading for display (3 decimals), or 'None' if it failed."""
+    if angles is None:
+        return "None"
+    return f"pitch={angles['pitch']:.3f} roll={angles['roll']:.3f}"
+
+
 def print_menu():
     print("\nMenu:")
     print("  1) Initialize I2C buses")
@@ -195,7 +402,7 @@ def print_menu():
 
 def main():
     """Menu-driven test for the IMU reader. Same structure as class labs."""
-    from time import sleep
+    from time import sleep, monotonic
 
     print("Posture Coach — IMU Reader Utility")
 
@@ -213,23 +420,32 @@ def main():
             if i2c is None:
                 print("\nPlease initialize buses first (option 1).\n")
                 continue
-            readings = read_all_imus()
+            readings = readings_as_dict(read_all_imus())
             print()
             for segment, angles in readings.items():
-                print(f"  {segment:<20}: {angles}")
+                print(f"  {segment:<20}: {format_angles(angles)}")
 
         elif choice == "3":
             if i2c is None:
                 print("\nPlease initialize buses first (option 1).\n")
                 continue
             print("\nStreaming... Ctrl+C to stop.\n")
+            next_t = monotonic()
             try:
                 while True:
-                    readings = read_all_imus()
+                    readings = readings_as_dict(read_all_imus())
                     print("-" * 40)
                     for segment, angles in readings.items():
-                        print(f"  {segment:<20}: {angles}")
-                    sleep(1.0)
+                        print(f"  {segment:<20}: {format_angles(angles)}")
+
+                    # Wait until the next 1 s tick, not 1 s after the sweep
+                    # finished, so the read time doesn't add to the period
+                    next_t += 1.0
+                    dt = next_t - monotonic()
+                    if dt > 0:
+                        sleep(dt)
+                    else:
+                        next_t = monotonic()
             except KeyboardInterrupt:
                 print("\nStopped.\n")
 
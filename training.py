@@ -2,15 +2,18 @@
 training.py
 ================================
 1. Loads posture_data.csv 
-2. trains a Random Forest classifier on pitch/roll angles from all 10 IMU
+2. trains a gradient-boosted tree classifier (or Random Forest) on pitch/roll
+   angles from all 10 IMU
 3. saves a model package
 
 Cite: https://www.datacamp.com/tutorial/random-forests-classifier-python
 """
 
 import joblib
+import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report
@@ -22,8 +25,9 @@ from sklearn.metrics import classification_report
 
 CSV_FILE    = "posture_data.csv"
 MODEL_FILE  = "model_package.joblib"
+MODEL_COMPRESS = ("lz4", 3)             # fast to decompress on the Pi; needs `pip install lz4`
 
-# Same segment/column order as data_collection.py
+# Same segment/column order as imu_reader.py (data_collection.py writes its CSV in this order)
 SEGMENTS = [
     "left_thigh", 
     "left_calf",
@@ -43,10 +47,26 @@ FEATURE_COLS = [
     for angle in ("pitch", "roll")
 ]
 
-# Random Forest settings — recycled n_estimators from DataCamp source
-N_ESTIMATORS = 100
+MODEL_TYPE   = "hist_gb"   # "hist_gb" or "random_forest" (needed for ONNX export)
 RANDOM_STATE = 42
 TEST_SIZE    = 0.2
+N_JOBS       = -1       # build/predict trees on every CPU core
+TOP_FEATURES = 10       # how many features print_feature_importances lists
+
+# Random Forest settings — recycled n_estimators from DataCamp source.
+# Leaf/depth limits stop trees growing to pure leaves: far smaller trees that
+# are quicker to walk on the Pi. If accuracy drops more than ~1% versus the
+# unlimited forest, raise N_ESTIMATORS to 200 before loosening the limits.
+N_ESTIMATORS     = 100
+MIN_SAMPLES_LEAF = 5
+MAX_DEPTH        = 12
+MAX_FEATURES     = "sqrt"
+
+# HistGradientBoosting settings — 100 shallow boosted trees are much smaller
+# than 100 full-depth forest trees and faster to predict on the Pi
+HGB_MAX_ITER      = 100
+HGB_LEARNING_RATE = 0.1
+HGB_MAX_DEPTH     = 6
 
 
 # -----------------------------
@@ -60,6 +80,7 @@ X_test     = None
 y_train    = None
 y_test     = None
 model      = None
+onnx_bytes = None       # serialized ONNX export of model, saved in the package
 encoder    = None
 
 
@@ -69,10 +90,16 @@ encoder    = None
 
 def load_data():
     """
-    Load CSV into a dataframe and drop rows with missing sensor reads
+    Load CSV into a dataframe and drop rows with missing sensor reads.
+
+    Column dtypes are given up front (float32 angles, categorical label), so
+    pandas skips type inference and the angles take half the memory of the
+    default float64.
     """
     global df
-    df = pd.read_csv(CSV_FILE)
+    dtypes = {col: np.float32 for col in FEATURE_COLS}
+    dtypes["label"] = "category"
+    df = pd.read_csv(CSV_FILE, dtype=dtypes)
     before = len(df)
     df = df.dropna(subset=FEATURE_COLS)
     print(f"Loaded {before} rows. {len(df)} remain after dropping incomplete sensor reads.")
@@ -81,13 +108,22 @@ def load_data():
 
 def encode_labels():
     """
-    Convert string labels to integers using LabelEncoder.
-    Saves the encoder so inference can decode predictions back to strings.
+    Convert string labels to integers.
+
+    The label column is already categorical (see load_data), so its category
+    codes are the encoding — no LabelEncoder.fit_transform pass over the
+    strings. Categories are sorted, which gives the same numbering as
+    LabelEncoder, and a LabelEncoder with those classes_ is still saved so
+    inference can decode predictions back to strings.
     """
     global df, encoder
+    labels = df["label"].cat.remove_unused_categories()
+    labels = labels.cat.reorder_categories(sorted(labels.cat.categories))
+
     encoder = LabelEncoder()
-    df["label_encoded"] = encoder.fit_transform(df["label"])
-    print(f"Label encoding: {dict(zip(encoder.classes_, encoder.transform(encoder.classes_)))}\n")
+    encoder.classes_ = labels.cat.categories.to_numpy()
+    df["label_encoded"] = labels.cat.codes.to_numpy(np.int32)
+    print(f"Label encoding: {dict(zip(encoder.classes_, range(len(encoder.classes_))))}\n")
 
 
 def split_data():
@@ -96,8 +132,11 @@ def split_data():
     """
     global df, X_train, X_test, y_train, y_test
 
-    X = df[FEATURE_COLS]
-    y = df["label_encoded"]
+    # Plain row-major float32 matrix — what the tree builders work on
+    # internally anyway. pandas stores the float32 columns as one
+    # column-major block, so make the row layout explicit here once.
+    X = np.ascontiguousarray(df[FEATURE_COLS].to_numpy(dtype=np.float32))
+    y = df["label_encoded"].to_numpy(np.int32)
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE
@@ -107,12 +146,30 @@ def split_data():
 
 def train_model():
     """
-    Train a Random Forest classifier.
+    Train the classifier selected by MODEL_TYPE.
     """
-    global model
-    model = RandomForestClassifier(n_estimators=N_ESTIMATORS, random_state=RANDOM_STATE)
+    global model, onnx_bytes
+    onnx_bytes = None       # any earlier export belongs to the previous model
+    if MODEL_TYPE == "random_forest":
+        model = RandomForestClassifier(
+            n_estimators=N_ESTIMATORS,
+            min_samples_leaf=MIN_SAMPLES_LEAF,
+            max_depth=MAX_DEPTH,
+            max_features=MAX_FEATURES,
+            random_state=RANDOM_STATE,
+            n_jobs=N_JOBS,
+        )
+        name = f"Random Forest with {N_ESTIMATORS} trees"
+    else:
+        model = HistGradientBoostingClassifier(
+            max_iter=HGB_MAX_ITER,
+            learning_rate=HGB_LEARNING_RATE,
+            max_depth=HGB_MAX_DEPTH,
+            random_state=RANDOM_STATE,
+        )
+        name = f"HistGradientBoosting with {HGB_MAX_ITER} iterations"
     model.fit(X_train, y_train)
-    print(f"Trained Random Forest with {N_ESTIMATORS} trees.\n")
+    print(f"Trained {name}.\n")
 
 
 def evaluate_model():
@@ -130,27 +187,85 @@ def print_feature_importances():
     """
     Print which body segments and angles the model relies on most.
     """
-    importances = zip(FEATURE_COLS, model.feature_importances_)
-    ranked = sorted(importances, key=lambda x: x[1], reverse=True)
-    print("Top 10 most important features:")
-    for feat, score in ranked[:10]:
-        print(f"  {feat:<30}: {score:.4f}")
+    if hasattr(model, "feature_importances_"):
+        scores = model.feature_importances_
+    else:
+        # HistGradientBoosting has no built-in importances — measure how much
+        # test accuracy drops when each feature is shuffled instead
+        result = permutation_importance(
+            model, X_test, y_test,
+            n_repeats=5, random_state=RANDOM_STATE, n_jobs=N_JOBS,
+        )
+        scores = result.importances_mean
+
+    # Pick the top k with a partial sort (O(n)), then order just those k
+    k = min(TOP_FEATURES, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    print(f"Top {k} most important features:")
+    for i in top:
+        print(f"  {FEATURE_COLS[i]:<30}: {scores[i]:.4f}")
     print()
 
 
 def save_model_package():
     """
-    Bundle the model, feature columns, and label encoder into one object and save.
+    Bundle the model, feature columns, label encoder and (if exported) the
+    ONNX copy of the model into one object and save.
     """
     package = {
         "model":        model,
         "feature_cols": FEATURE_COLS,
         "encoder":      encoder,
+        "onnx":         onnx_bytes,
     }
-    joblib.dump(package, MODEL_FILE)
+    try:
+        joblib.dump(package, MODEL_FILE, compress=MODEL_COMPRESS)
+    except ValueError as e:
+        # joblib refuses lz4 compression when lz4 isn't installed; save with
+        # zlib instead so the trained model isn't lost (joblib.load reads both)
+        if "lz4" not in str(e).lower():
+            raise
+        print("lz4 not installed — pip install lz4. Saving with zlib instead.")
+        joblib.dump(package, MODEL_FILE, compress=3)
     print(f"Model package saved to {MODEL_FILE}\n")
 
 
+def export_onnx():
+    """
+    Convert the trained model to ONNX and re-save the model package with it.
+    deploy.py runs the export with onnxruntime's compiled tree evaluator,
+    which predicts a single 20-feature row much faster than sklearn on the Pi.
+
+    Keeping the export inside the package (instead of a separate file) means
+    it can never be paired with a different model or label encoder.
+
+    Optional: needs `pip install skl2onnx` (laptop) and `pip install
+    onnxruntime` (Pi). Only verified for MODEL_TYPE = "random_forest" —
+    skl2onnx fails on HistGradientBoosting, in which case nothing is saved
+    and deploy.py keeps using sklearn.
+    """
+    global onnx_bytes
+
+    try:
+        from skl2onnx import to_onnx
+    except ImportError:
+        print("skl2onnx not installed — pip install skl2onnx\n")
+        return
+
+    # Input type is taken from X_train (float32, FEATURE_COLS order);
+    # zipmap off so the output is a plain label array, not a list of dicts
+    try:
+        onx = to_onnx(model, X_train[:1], options={id(model): {"zipmap": False}})
+    except Exception as e:
+        print(f"ONNX export failed for MODEL_TYPE={MODEL_TYPE!r}: {e}")
+        print('Only "random_forest" is known to export. Package left unchanged.\n')
+        return
+    onnx_bytes = onx.SerializeToString()
+    print("ONNX export added to the model package.")
+    save_model_package()
+
+
 # -----------------------------
 # Menu
 # Recycled: same structure as all class labs
@@ -161,11 +276,12 @@ def print_menu():
     print(f"  1) Load {CSV_FILE}")
     print("  2) Encode labels")
     print("  3) Train/test split")
-    print("  4) Train Random Forest")
+    print("  4) Train model")
     print("  5) Evaluate model")
     print("  6) Print feature importances")
     print(f"  7) Save model package ({MODEL_FILE})")
-    print("  8) Quit")
+    print(f"  8) Export ONNX into model package ({MODEL_FILE})")
+    print("  9) Quit")
 
 
 def main():
@@ -178,7 +294,7 @@ def main():
 
     while True:
         print_menu()
-        choice = input("\nChoose an option (1-8): ").strip()
+        choice = input("\nChoose an option (1-9): ").strip()
 
         if choice == "1":
             try:
@@ -223,11 +339,17 @@ def main():
             save_model_package()
 
         elif choice == "8":
+            if model is None:
+                print("\nTrain the model first (option 4).\n")
+                continue
+            export_onnx()
+
+        elif choice == "9":
             print("Done.")
             break
 
         else:
-            print("\nInvalid choice. Pick 1-8.\n")
+            print("\nInvalid choice. Pick 1-9.\n")
 
 
 if __name__ == "__main__":